@@ -208,7 +208,14 @@ def auth_context_from_auth_token(token):
 
 
 def auth_context_from_request(request):
-    return auth_context_from_auth_token(session_from_request(request))
+    # Resolve the auth context once per request; views and helpers that
+    # each call this share the cached instance through the environ.
+    auth_context = request.environ.get('mist.auth_context')
+    if auth_context is None:
+        auth_context = auth_context_from_auth_token(
+            session_from_request(request))
+        request.environ['mist.auth_context'] = auth_context
+    return auth_context
 
 
 def auth_context_from_session_id(session_id):
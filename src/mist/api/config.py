@@ -1141,6 +1141,7 @@ CELERY_SETTINGS = {
         # Scripts queue (handled by gevent)
         'mist.api.tasks.group_run_script': {'queue': 'scripts'},
         'mist.api.tasks.run_script': {'queue': 'scripts'},
+        'mist.api.tasks.validate_and_run_script': {'queue': 'scripts'},
         'mist.api.tasks.group_machines_actions': {'queue': 'scripts'},
         'mist.api.tasks.machine_action': {'queue': 'scripts'},
 
@@ -1977,6 +1978,9 @@ ENABLE_AB = False
 ENABLE_R12N = False
 ENABLE_MONITORING = True
 ENABLE_SHELL_CAPTURE = False
+# Move run_script's machine/script lookups & permission checks into the
+# worker, so the HTTP handler returns as soon as the job is queued.
+ASYNC_SCRIPT_VALIDATION = False
 MACHINE_PATCHES = True
 ACCELERATE_MACHINE_POLLING = True
 PROCESS_POOL_WORKERS = 0
@@ -107,9 +107,12 @@ class Zone(OwnershipMixin, me.Document):
     @property
     def tags(self):
         """Return the tags of this zone."""
-        return {tag.key: tag.value
+        if not hasattr(self, '_tags_cache'):
+            self._tags_cache = {
+                tag.key: tag.value
                 for tag in Tag.objects(
                     resource_id=self.id, resource_type='zone')}
+        return self._tags_cache
 
     def as_dict(self):
         """Return a dict with the model values."""
@@ -236,9 +239,12 @@ class Record(OwnershipMixin, me.Document):
     @property
     def tags(self):
         """Return the tags of this record."""
-        return {tag.key: tag.value
+        if not hasattr(self, '_tags_cache'):
+            self._tags_cache = {
+                tag.key: tag.value
                 for tag in Tag.objects(resource_id=self.id,
                                        resource_type='record')}
+        return self._tags_cache
 
     def as_dict(self):
         """ Return a dict with the model values."""
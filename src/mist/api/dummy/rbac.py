@@ -35,6 +35,14 @@ class AuthContext(object):
     def check_perm(self, rtype, action, rid):
         return {}, {}
 
+    def check_perm_bulk(self, rtype, action, rids):
+        """Check permission on many resource ids at once.
+
+        Returns the set of ids the context is allowed to act upon, so
+        callers resolve policy once instead of calling check_perm per id.
+        """
+        return set(rids)
+
     def get_security_tags(self):
         return []
 
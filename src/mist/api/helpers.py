@@ -381,6 +381,10 @@ def trigger_session_update(owner, sections=['clouds', 'keys', 'monitoring',
                                             'scripts', 'templates', 'stacks',
                                             'schedules', 'user', 'org',
                                             'zones']):
+    if 'monitoring' in sections:
+        from mist.api.monitoring.methods import check_monitoring_invalidate
+        check_monitoring_invalidate(
+            owner.id if hasattr(owner, 'id') else owner)
     amqp_publish_user(owner, routing_key='update', data=sections)
 
 
@@ -36,9 +36,12 @@ class CloudImage(OwnershipMixin, me.Document):
     @property
     def tags(self):
         """Return the tags of this image."""
-        return {tag.key: tag.value
+        if not hasattr(self, '_tags_cache'):
+            self._tags_cache = {
+                tag.key: tag.value
                 for tag in Tag.objects(resource_id=self.id,
                                        resource_type='image')}
+        return self._tags_cache
 
     def __str__(self):
         name = "%s, %s (%s)" % (self.name, self.cloud.id, self.external_id)
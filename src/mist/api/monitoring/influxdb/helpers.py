@@ -82,13 +82,28 @@ def show_fields(measurement=None):
     return fields
 
 
+def show_all_fields(machine_id):
+    """Return the field keys of all the machine's measurements at once.
+
+    This issues a single SHOW FIELD KEYS query covering every measurement
+    reported by the machine, instead of querying per measurement.
+    """
+    measurements = show_measurements(machine_id)
+    if not measurements:
+        return []
+    return show_fields(measurements)
+
+
 def show_tags(measurement=None):
     """Return all tags associated with the specified measurement."""
     tags = {}
-    for series, keys in show_tag_keys(measurement).items():
-        tags[series] = {}
-        for key in keys:
-            tags[series][key] = show_tag_values(key)
+    series_keys = show_tag_keys(measurement)
+    all_keys = set()
+    for keys in series_keys.values():
+        all_keys.update(keys)
+    values = show_tag_values_bulk(all_keys)
+    for series, keys in series_keys.items():
+        tags[series] = {key: values.get(key, []) for key in keys}
     return tags
 
 
@@ -117,6 +132,26 @@ def show_tag_keys(measurement=None):
     return tags
 
 
+def show_tag_values_bulk(keys):
+    """Return all tag values of the specified keys with a single query."""
+    if not keys:
+        return {}
+    q = 'SHOW TAG VALUES WITH KEY IN (%s)' % ','.join(
+        '"%s"' % key for key in keys)
+    url = '%(host)s/query?db=%(db)s' % INFLUX
+    data = requests.get('%s&q=%s' % (url, q))
+    if not data.ok:
+        log.error('Got %d on SHOW TAG VAL: %s', data.status_code, data.content)
+        raise ServiceUnavailableError()
+    tags = {key: set() for key in keys}
+    results = data.json().get('results', [])
+    results = results[0] if results else {}
+    for series in results.get('series', []):
+        for value in series['values']:
+            tags[value[0]].add(value[1])
+    return {key: list(values) for key, values in tags.items()}
+
+
 def show_tag_values(key):
     """Return all tag values of the specified key."""
     q = 'SHOW TAG VALUES WITH KEY = "%s"' % key
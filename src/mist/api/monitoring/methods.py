@@ -5,6 +5,7 @@ import time
 import datetime
 import logging
 import asyncio
+import threading
 
 import mongoengine as me
 
@@ -24,8 +25,7 @@ from mist.api.clouds.models import Cloud
 from mist.api.machines.models import Machine
 from mist.api.machines.models import InstallationStatus
 
-from mist.api.monitoring.influxdb.helpers import show_fields
-from mist.api.monitoring.influxdb.helpers import show_measurements
+from mist.api.monitoring.influxdb.helpers import show_all_fields
 from mist.api.monitoring.influxdb.handlers import HANDLERS as INFLUXDB_HANDLERS
 from mist.api.monitoring.influxdb.handlers \
     import MainStatsHandler as InfluxMainStatsHandler
@@ -154,21 +154,15 @@ def get_load(owner, start="", stop="", step="", uuids=None):
     if uuids:
         machines.filter(id__in=uuids)
 
-    graphite_uuids = [
-        machine.id
-        for machine in machines
-        if machine.monitoring.method.endswith("-graphite")
-    ]
-    influx_uuids = [
-        machine.id
-        for machine in machines
-        if machine.monitoring.method.endswith("-influxdb")
-    ]
-    fdb_uuids = [
-        machine.id
-        for machine in machines
-        if machine.monitoring.method.endswith("-tsfdb")
-    ]
+    # Bucket machine ids by monitoring method suffix in a single pass.
+    buckets = {"graphite": [], "influxdb": [], "tsfdb": []}
+    for machine in machines.only("id", "monitoring__method"):
+        method = machine.monitoring.method.rsplit("-", 1)[-1]
+        if method in buckets:
+            buckets[method].append(machine.id)
+    graphite_uuids = buckets["graphite"]
+    influx_uuids = buckets["influxdb"]
+    fdb_uuids = buckets["tsfdb"]
 
     graphite_data = {}
     influx_data = {}
@@ -214,21 +208,15 @@ def get_cores(owner, start="", stop="", step="", uuids=None):
     if uuids:
         machines.filter(id__in=uuids)
 
-    graphite_uuids = [
-        machine.id
-        for machine in machines
-        if machine.monitoring.method.endswith("-graphite")
-    ]
-    influx_uuids = [
-        machine.id
-        for machine in machines
-        if machine.monitoring.method.endswith("-influxdb")
-    ]
-    fdb_uuids = [
-        machine.id
-        for machine in machines
-        if machine.monitoring.method.endswith("-tsfdb")
-    ]
+    # Bucket machine ids by monitoring method suffix in a single pass.
+    buckets = {"graphite": [], "influxdb": [], "tsfdb": []}
+    for machine in machines.only("id", "monitoring__method"):
+        method = machine.monitoring.method.rsplit("-", 1)[-1]
+        if method in buckets:
+            buckets[method].append(machine.id)
+    graphite_uuids = buckets["graphite"]
+    influx_uuids = buckets["influxdb"]
+    fdb_uuids = buckets["tsfdb"]
 
     graphite_data = {}
     influx_data = {}
@@ -264,8 +252,24 @@ def get_cores(owner, start="", stop="", step="", uuids=None):
         raise NotFoundError("No machine has monitoring enabled")
 
 
+# Short-lived, per-process cache of check_monitoring's payload, keyed on
+# owner id. The UI polls check_monitoring on a short interval, while the
+# payload only changes when machines/rules/metrics mutate.
+_CHECK_MONITORING_CACHE = {}
+_CHECK_MONITORING_CACHE_TTL = 5  # seconds
+_CHECK_MONITORING_CACHE_MAX = 1000  # owners
+
+
+def check_monitoring_invalidate(owner_id):
+    """Drop the cached check_monitoring payload of the given owner."""
+    _CHECK_MONITORING_CACHE.pop(owner_id, None)
+
+
 def check_monitoring(owner):
     """Return the monitored machines, enabled metrics, and user details."""
+    cached = _CHECK_MONITORING_CACHE.get(owner.id)
+    if cached is not None and cached[0] > time.time():
+        return cached[1]
 
     custom_metrics = owner.get_metrics_dict()
     for metric in list(custom_metrics.values()):
@@ -334,6 +338,18 @@ def check_monitoring(owner):
     for key in ("rules", "builtin_metrics", "custom_metrics"):
         for id in ret[key]:
             ret[key][id]["id"] = id
+    # Keep the cache bounded: purge expired entries once it fills up, so
+    # owners that stop polling don't accumulate forever.
+    if len(_CHECK_MONITORING_CACHE) >= _CHECK_MONITORING_CACHE_MAX:
+        now = time.time()
+        for key in [k for k, v in _CHECK_MONITORING_CACHE.items()
+                    if v[0] <= now]:
+            _CHECK_MONITORING_CACHE.pop(key, None)
+        if len(_CHECK_MONITORING_CACHE) >= _CHECK_MONITORING_CACHE_MAX:
+            _CHECK_MONITORING_CACHE.clear()
+    _CHECK_MONITORING_CACHE[owner.id] = (
+        time.time() + _CHECK_MONITORING_CACHE_TTL, ret
+    )
     return ret
 
 
@@ -362,6 +378,7 @@ def enable_monitoring(
     job_id="",
     deploy_async=True,
     plugins=None,
+    force=False,
 ):
     """Enable monitoring for a machine.
 
@@ -369,6 +386,10 @@ def enable_monitoring(
     Otherwise, the installation command will be returned to the User in order
     to be ran manually.
 
+    If monitoring is already enabled, this is a no-op that returns the
+    machine's installation commands, unless `force` is set, in which case
+    the entire flow reruns and the agent is re-provisioned.
+
     """
     log.info(
         "%s: Enabling monitoring for machine '%s' in cloud '%s'.",
@@ -393,6 +414,30 @@ def enable_monitoring(
             machine_id,
             cloud_id,
         )
+        # Re-enabling after a failed install is how users redeploy the
+        # agent, so only idempotent calls on a healthy installation get
+        # the shortcut.
+        failed = (
+            machine.monitoring.installation_status.state == "failed" and
+            not machine.monitoring.installation_status.activated_at
+        )
+        if not force and not dry and not failed:
+            # Idempotent call: return the installation commands without
+            # resetting the installation status, republishing the traefik
+            # config or re-enqueuing the agent deployment.
+            ret_dict = {}
+            for os_type, cmd in list(
+                    machine.monitoring.get_commands().items()):
+                ret_dict["%s_command" % os_type] = cmd
+            # for backwards compatibility
+            ret_dict["command"] = ret_dict["unix_command"]
+            ret_dict["extra_vars"] = {
+                "uuid": machine.id, "monitor": config.INFLUX["host"]
+            }
+            ret_dict["installation_status"] = (
+                machine.monitoring.installation_status.as_dict()
+            )
+            return ret_dict
 
     old_monitoring_method = machine.monitoring.method
     # Decide on monitoring method
@@ -539,11 +584,14 @@ def disable_monitoring(owner, cloud_id, machine_id, no_ssh=False, job_id=""):
     # If the machine we are trying to disable monitoring for is the only one
     # included in a rule, then delete the rule. Otherwise, attempt to remove
     # the machine from the list of resources the rule is referring to.
+    rules_to_delete = []
     for rule in Rule.objects(owner_id=machine.owner.id):
         if rule.ctl.includes_only(machine):
-            rule.delete()
+            rules_to_delete.append(rule.id)
         else:
             rule.ctl.maybe_remove(machine)
+    if rules_to_delete:
+        Rule.objects(id__in=rules_to_delete).delete(write_concern={"w": 0})
 
     machine.monitoring.hasmonitoring = False
     machine.monitoring.activated_at = 0
@@ -592,6 +640,29 @@ def disable_monitoring_cloud(owner, cloud_id, no_ssh=False):
             )
 
 
+# Shared event loop running in a background daemon thread, so that
+# find_metrics_by_* don't pay for constructing and tearing down a fresh
+# event loop on every call.
+_BG_LOOP = None
+_BG_LOOP_LOCK = threading.Lock()
+
+
+def _get_background_loop():
+    """Return the shared event loop, starting its thread on first use."""
+    global _BG_LOOP
+    if _BG_LOOP is None:
+        with _BG_LOOP_LOCK:
+            if _BG_LOOP is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name="monitoring-bg-loop",
+                    daemon=True,
+                ).start()
+                _BG_LOOP = loop
+    return _BG_LOOP
+
+
 async def async_find_metrics(resources):
     loop = asyncio.get_event_loop()
     metrics_all = [
@@ -619,7 +690,7 @@ def find_metrics(resource):
         return graphite_find_metrics(resource)
     elif resource.monitoring.method == 'telegraf-influxdb':
         metrics = {}
-        for metric in show_fields(show_measurements(resource.id)):
+        for metric in show_all_fields(resource.id):
             metrics[metric['id']] = metric
         return metrics
     elif resource.monitoring.method == "telegraf-tsfdb":
@@ -696,37 +767,42 @@ def undeploy_python_plugin(machine, plugin_id):
 
 
 def filter_resources_by_tags(resources, tags):
-    filtered_resources = []
-    for resource in resources:
-        resource_tags = get_tags_for_resource(resource.owner, resource)
-        if tags.items() <= resource_tags.items():
-            filtered_resources.append(resource)
-    return filtered_resources
+    required = set(tags.items())
+    return [
+        resource for resource in resources
+        if required <= set(
+            get_tags_for_resource(resource.owner, resource).items())
+    ]
 
 
-def list_resources(resource_type, owner, as_dict=True):
+# Resolved model classes per resource type, so the hot path is a single
+# dict lookup instead of a capitalize() + getattr() per call.
+_RESOURCE_MODELS = {}
+
+
+def _resource_model(resource_type):
+    """Return the model class of the specified resource type."""
     try:
-        resource_objs = getattr(
-            mist.api.models, resource_type.capitalize()).objects(
-            owner=owner)
-    except getattr(
-            mist.api.models, resource_type.capitalize()).DoesNotExist:
-        raise NotFoundError(
-            "Resouce with type %s not found" % resource_type)
+        return _RESOURCE_MODELS[resource_type]
+    except KeyError:
+        import mist.api.models
+        cls = getattr(mist.api.models, resource_type.capitalize(), None)
+        if cls is None:
+            raise NotFoundError(
+                "Resouce with type %s not found" % resource_type)
+        _RESOURCE_MODELS[resource_type] = cls
+        return cls
+
+
+def list_resources(resource_type, owner, as_dict=True):
+    resource_objs = _resource_model(resource_type).objects(owner=owner)
     if as_dict:
         return [resource.as_dict() for resource in resource_objs]
     return resource_objs
 
 
 def list_resources_by_id(resource_type, resource_id, as_dict=True):
-    try:
-        resource_objs = getattr(
-            mist.api.models, resource_type.capitalize()).objects(
-            id=resource_id)
-    except getattr(
-            mist.api.models, resource_type.capitalize()).DoesNotExist:
-        raise NotFoundError(
-            "Resouce with type %s not found" % resource_type)
+    resource_objs = _resource_model(resource_type).objects(id=resource_id)
     if as_dict:
         return [resource.as_dict() for resource in resource_objs]
     return resource_objs
@@ -809,10 +885,8 @@ def find_metrics_by_resource_type(auth_context, resource_type, tags):
     if tags and resources:
         resources = filter_resources_by_tags(resources, tags)
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    metrics = loop.run_until_complete(async_find_metrics(resources))
-    loop.close()
+    metrics = asyncio.run_coroutine_threadsafe(
+        async_find_metrics(resources), _get_background_loop()).result()
     return metrics
 
 
@@ -829,8 +903,6 @@ def find_metrics_by_tags(auth_context, tags):
     if resources:
         resources = filter_resources_by_tags(resources, tags)
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    metrics = loop.run_until_complete(async_find_metrics(resources))
-    loop.close()
+    metrics = asyncio.run_coroutine_threadsafe(
+        async_find_metrics(resources), _get_background_loop()).result()
     return metrics
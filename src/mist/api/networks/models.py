@@ -108,9 +108,12 @@ class Network(OwnershipMixin, me.Document):
     @property
     def tags(self):
         """Return the tags of this network."""
-        return {tag.key: tag.value
+        if not hasattr(self, '_tags_cache'):
+            self._tags_cache = {
+                tag.key: tag.value
                 for tag in Tag.objects(resource_id=self.id,
                                        resource_type='network')}
+        return self._tags_cache
 
     def clean(self):
         """Checks the CIDR to determine if it maps to a valid IPv4 network."""
@@ -302,9 +305,12 @@ class Subnet(me.Document):
     @property
     def tags(self):
         """Return the tags of this subnet."""
-        return {tag.key: tag.value
+        if not hasattr(self, '_tags_cache'):
+            self._tags_cache = {
+                tag.key: tag.value
                 for tag in Tag.objects(resource_id=self.id,
                                        resource_type='subnet')}
+        return self._tags_cache
 
     def clean(self):
         """Checks the CIDR to determine if it maps to a valid IPv4 network."""
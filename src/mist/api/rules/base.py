@@ -308,15 +308,18 @@ class ResourceRuleController(BaseController):
 
         # Attempt to remove `resource` from any of the rule's selectors,
         # if `resource` is explicitly specified by its UUID.
+        changed = False
         for selector in self.rule.selectors:
             if isinstance(selector, GenericResourceSelector):
                 for i, rid in enumerate(selector.ids):
                     if rid == resource.id:
                         log.info('Removing %s from %s', resource, self.rule)
                         selector.ids.pop(i)
+                        changed = True
                         break
 
-        self.rule.save()
+        if changed:
+            self.rule.save()
 
     def includes_only(self, resource):
         # The rule does not refer to resources of the given type.
@@ -86,6 +86,7 @@ class BaseScriptController(object):
         for key, value in kwargs.items():
             setattr(self.script, key, value)
 
+        self.script.updated = datetime.datetime.utcnow()
         try:
             self.script.save()
         except me.ValidationError as exc:
@@ -107,6 +108,7 @@ class BaseScriptController(object):
             self.script.name = name
         if description:
             self.script.description = description
+        self.script.updated = datetime.datetime.utcnow()
         self.script.save()
         log.info("Edit script: '%s'.", self.script.id)
         trigger_session_update(self.script.owner, ['scripts'])
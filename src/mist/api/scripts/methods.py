@@ -1,13 +1,18 @@
 from mist.api.scripts.models import Script
-from mist.api.tag.methods import get_tags_for_resource
+from mist.api.tag.methods import get_tags_for_resources
 
 
 def list_scripts(owner):
-    scripts = Script.objects(owner=owner, deleted=None)
+    # Fetch only the fields as_dict serializes. The location is part of
+    # the API payload, so it cannot be excluded here.
+    scripts = Script.objects(owner=owner, deleted=None).only(
+        'id', 'name', 'description', 'location', 'owned_by', 'created_by')
+    scripts = list(scripts)
+    tags = get_tags_for_resources(owner, scripts)
     script_objects = []
     for script in scripts:
         script_object = script.as_dict()
-        script_object["tags"] = get_tags_for_resource(owner, script)
+        script_object["tags"] = tags[script.id]
         script_objects.append(script_object)
     return script_objects
 
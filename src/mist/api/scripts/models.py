@@ -141,6 +141,7 @@ class Script(OwnershipMixin, me.Document):
                 'unique': True,
                 'cls': False,
             },
+            ('owner', 'deleted'),
         ],
     }
 
@@ -154,6 +155,7 @@ class Script(OwnershipMixin, me.Document):
     location = me.EmbeddedDocumentField(Location, required=True)
 
     deleted = me.DateTimeField()
+    updated = me.DateTimeField()
 
     migrated = me.BooleanField()  # NOTE For collectd scripts' migration.
 
@@ -161,24 +163,29 @@ class Script(OwnershipMixin, me.Document):
 
     def __init__(self, *args, **kwargs):
         super(Script, self).__init__(*args, **kwargs)
+        # Validate the controller class and calculate the script type
+        # specific fields once per subclass; subsequent instantiations
+        # skip straight to constructing the controller.
+        if '_script_specific_fields' not in type(self).__dict__:
+            if self._controller_cls is None:
+                raise NotImplementedError(
+                    "Can't initialize %s. Script is an abstract base class "
+                    "and shouldn't be used to create script instances. All "
+                    "Script subclasses should define a `_controller_cls` "
+                    "class attribute pointing to a `BaseController` "
+                    "subclass." % self
+                )
+            elif not issubclass(self._controller_cls, BaseScriptController):
+                raise TypeError(
+                    "Can't initialize %s.  All Script subclasses should "
+                    "define a `_controller_cls` class attribute pointing to "
+                    "a `BaseController` subclass." % self
+                )
+            type(self)._script_specific_fields = [
+                field for field in type(self)._fields
+                if field not in Script._fields]
         # Set attribute `ctl` to an instance of the appropriate controller.
-        if self._controller_cls is None:
-            raise NotImplementedError(
-                "Can't initialize %s. Script is an abstract base class and "
-                "shouldn't be used to create script instances. All Script "
-                "subclasses should define a `_controller_cls` class attribute "
-                "pointing to a `BaseController` subclass." % self
-            )
-        elif not issubclass(self._controller_cls, BaseScriptController):
-            raise TypeError(
-                "Can't initialize %s.  All Script subclasses should define a"
-                " `_controller_cls` class attribute pointing to a "
-                "`BaseController` subclass." % self
-            )
         self.ctl = self._controller_cls(self)
-        # Calculate and store script type specific fields.
-        self._script_specific_fields = [field for field in type(self)._fields
-                                        if field not in Script._fields]
 
     @classmethod
     def add(cls, owner, name, id='', **kwargs):
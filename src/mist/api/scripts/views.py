@@ -1,5 +1,10 @@
 import uuid
 import json
+import logging
+import hashlib
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Python 2 and 3 support
 from future.utils import string_types
@@ -22,7 +27,8 @@ from mist.api.auth.methods import auth_context_from_request
 
 from mist.api.exceptions import RequiredParameterMissingError
 from mist.api.exceptions import BadRequestError, NotFoundError
-from mist.api.exceptions import PolicyUnauthorizedError, UnauthorizedError
+from mist.api.exceptions import UnauthorizedError
+from mist.api.exceptions import PolicyUnauthorizedError
 
 from mist.api.helpers import view_config, params_from_request
 from mist.api.helpers import mac_sign
@@ -35,8 +41,13 @@ from mist.api.tag.methods import add_tags_to_resource
 
 from mist.api import config
 
+log = logging.getLogger(__name__)
+
 OK = Response("OK", 200)
 
+# Base of the signed-url endpoint, fixed at import time.
+_FETCH_URL = "%s/api/v1/fetch?" % config.CORE_URI
+
 
 @view_config(route_name='api_v1_scripts', request_method='GET',
              renderer='json')
@@ -134,6 +145,9 @@ def add_script(request):
                              list(script_tags.items()))
 
     script = script.as_dict()
+    if script_tags:
+        # The tags were computed above; echo them without re-querying.
+        script['tags'] = dict(script_tags)
 
     if 'job_id' in params:
         script['job_id'] = params['job_id']
@@ -169,6 +183,10 @@ def show_script(request):
       type: string
       required: true
       in: path
+    include_jobs:
+      type: boolean
+      in: query
+      description: set to false to skip the job history
     """
     script_id = request.matchdict['script_id']
     auth_context = auth_context_from_request(request)
@@ -185,9 +203,25 @@ def show_script(request):
     # SEC require READ permission on SCRIPT
     auth_context.check_perm('script', 'read', script_id)
 
+    params = params_from_request(request)
+    include_jobs = str(params.get('include_jobs', 'true')).lower() == 'true'
+
+    # Validator based on the script's last update, so polling clients skip
+    # the re-serialization on repeat reads. The job history changes with
+    # every run without touching the script, so responses that embed it
+    # can't be validated this way and are always served fresh.
+    if not include_jobs:
+        etag = hashlib.sha256(
+            ('%s:%s' % (script.id, script.updated or '')).encode()
+        ).hexdigest()
+        if request.if_none_match and etag in request.if_none_match:
+            return Response(status=304)
+        request.response.etag = etag
+
     ret_dict = script.as_dict()
-    jobs = get_stories('job', auth_context.owner.id, script_id=script_id)
-    ret_dict['jobs'] = [job['job_id'] for job in jobs]
+    if include_jobs:
+        jobs = get_stories('job', auth_context.owner.id, script_id=script_id)
+        ret_dict['jobs'] = [job['job_id'] for job in jobs]
     return ret_dict
 
 
@@ -219,10 +253,29 @@ def download_script(request):
 
     # SEC require READ permission on SCRIPT
     auth_context.check_perm('script', 'read', script_id)
+
+    # Answer conditional requests before touching the file source, so
+    # periodic fetches of an unchanged script skip the body entirely.
+    # Only inline scripts get a validator: github/url scripts re-download
+    # upstream content that may change without `updated` being bumped.
+    etag = None
+    if script.location.type == 'inline':
+        etag = hashlib.sha256(
+            ('%s:%s' % (script.id, script.updated or '')).encode()
+        ).hexdigest()
+        if request.if_none_match and etag in request.if_none_match:
+            return Response(status=304)
+
     try:
-        return script.ctl.get_file()
+        ret = script.ctl.get_file()
     except BadRequestError():
         return Response("Unable to find: {}".format(request.path_info))
+    if etag:
+        if isinstance(ret, Response):
+            ret.etag = etag
+        else:
+            request.response.etag = etag
+    return ret
 
 
 # SEC
@@ -284,35 +337,58 @@ def delete_scripts(request):
     auth_context = auth_context_from_request(request)
     params = params_from_request(request)
     script_ids = params.get('script_ids', [])
-    if type(script_ids) != list or len(script_ids) == 0:
+    if isinstance(script_ids, str):
+        script_ids = [script_id.strip()
+                      for script_id in script_ids.split(',') if script_id]
+    if not isinstance(script_ids, (list, tuple)) or len(script_ids) == 0:
         raise RequiredParameterMissingError('No script ids provided')
 
     # remove duplicate ids if there are any
-    script_ids = sorted(script_ids)
-    i = 1
-    while i < len(script_ids):
-        if script_ids[i] == script_ids[i - 1]:
-            script_ids = script_ids[:i] + script_ids[i + 1:]
-        else:
-            i += 1
+    script_ids = list(dict.fromkeys(script_ids))
+
+    # fetch all scripts in a single query
+    found = {script.id: script
+             for script in Script.objects(owner=auth_context.owner,
+                                          id__in=script_ids, deleted=None)}
+
+    # SEC require REMOVE permission on each script, resolved in one go
+    # where the AuthContext implementation supports it.
+    if hasattr(auth_context, 'check_perm_bulk'):
+        allowed_ids = auth_context.check_perm_bulk('script', 'remove',
+                                                   found.keys())
+    else:
+        allowed_ids = set()
+        for script_id in found:
+            try:
+                auth_context.check_perm('script', 'remove', script_id)
+            except PolicyUnauthorizedError:
+                continue
+            allowed_ids.add(script_id)
+    # /SEC
 
     report = {}
+    to_delete = []
     for script_id in script_ids:
-        try:
-            script = Script.objects.get(owner=auth_context.owner,
-                                        id=script_id, deleted=None)
-        except me.DoesNotExist:
+        if script_id not in found:
             report[script_id] = 'not_found'
-            continue
-        # SEC require REMOVE permission on script
-        try:
-            auth_context.check_perm('script', 'remove', script_id)
-        except PolicyUnauthorizedError:
+        elif script_id not in allowed_ids:
             report[script_id] = 'unauthorized'
         else:
-            script.ctl.delete()
-            report[script_id] = 'deleted'
-        # /SEC
+            to_delete.append(script_id)
+
+    if to_delete:
+        # Deletions may reach out to external sources, so overlap their
+        # I/O instead of running them serially.
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = {script_id: pool.submit(found[script_id].ctl.delete)
+                       for script_id in to_delete}
+        for script_id, future in futures.items():
+            exc = future.exception()
+            if exc is None:
+                report[script_id] = 'deleted'
+            else:
+                log.error('Error deleting script %s: %r', script_id, exc)
+                report[script_id] = 'error'
 
     # if no script id was valid raise exception
     if len([script_id for script_id in report
@@ -351,13 +427,13 @@ def edit_script(request):
     new_description = params.get('new_description')
 
     auth_context = auth_context_from_request(request)
-    # SEC require EDIT permission on script
-    auth_context.check_perm('script', 'edit', script_id)
     try:
         script = Script.objects.get(owner=auth_context.owner,
                                     id=script_id, deleted=None)
     except me.DoesNotExist:
         raise NotFoundError('Script id not found')
+    # SEC require EDIT permission on script
+    auth_context.check_perm('script', 'edit', script_id)
 
     if not new_name:
         raise RequiredParameterMissingError('No new name provided')
@@ -412,6 +488,26 @@ def run_script(request):
         env = json.dumps(env)
 
     auth_context = auth_context_from_request(request)
+
+    if config.ASYNC_SCRIPT_VALIDATION:
+        # Validate only the parameter format here and let the worker do
+        # the machine/script lookups and permission checks.
+        machine_selector = {}
+        if 'machine_uuid' in params:
+            if not params.get('machine_uuid'):
+                raise RequiredParameterMissingError('machine_uuid')
+            machine_selector['machine_uuid'] = params['machine_uuid']
+        else:
+            for key in ('cloud_id', 'machine_id'):
+                if key not in params:
+                    raise RequiredParameterMissingError(key)
+            machine_selector['cloud_id'] = params['cloud_id']
+            machine_selector['machine_id'] = params['machine_id']
+        tasks.validate_and_run_script.delay(
+            auth_context.serialize(), script_id, machine_selector,
+            params=script_params, env=env, su=su, job_id=job_id, job=job)
+        return {'job_id': job_id, 'job': job, 'status': 'queued'}
+
     if 'machine_uuid' in params:
         machine_uuid = params.get('machine_uuid')
         if not machine_uuid:
@@ -443,18 +539,17 @@ def run_script(request):
         except me.DoesNotExist:
             raise NotFoundError("Machine %s doesn't exist" % machine_id)
 
+    # Only the script's id is needed below, so skip full deserialization.
+    script = Script.objects(owner=auth_context.owner,
+                            id=script_id, deleted=None).only('id').first()
+    if script is None:
+        raise NotFoundError('Script id not found')
     # SEC require permission READ on cloud
     auth_context.check_perm("cloud", "read", cloud_id)
     # SEC require permission RUN_SCRIPT on machine
     auth_context.check_perm("machine", "run_script", machine.id)
     # SEC require permission RUN on script
     auth_context.check_perm('script', 'run', script_id)
-    try:
-        script = Script.objects.get(owner=auth_context.owner,
-                                    id=script_id, deleted=None)
-    except me.DoesNotExist:
-        raise NotFoundError('Script id not found')
-    job_id = job_id or uuid.uuid4().hex
     tasks.run_script.delay(auth_context.owner.id, script.id,
                            machine.id, params=script_params,
                            env=env, su=su, job_id=job_id, job=job)
@@ -479,10 +574,9 @@ def url_script(request):
     auth_context = auth_context_from_request(request)
     script_id = request.matchdict['script_id']
 
-    try:
-        Script.objects.get(owner=auth_context.owner,
-                           id=script_id, deleted=None)
-    except Script.DoesNotExist:
+    # Only existence matters here, so skip full deserialization.
+    if not Script.objects(owner=auth_context.owner, id=script_id,
+                          deleted=None).only('id').first():
         raise NotFoundError('Script does not exist.')
 
     # SEC require READ permission on script
@@ -493,17 +587,26 @@ def url_script(request):
     expires_in = 60 * 15
     mac_sign(hmac_params, expires_in)
 
-    url = "%s/api/v1/fetch" % config.CORE_URI
-    encode_params = urllib.parse.urlencode(hmac_params)
-    r_url = url + '?' + encode_params
+    return _FETCH_URL + urllib.parse.urlencode(hmac_params)
 
-    return r_url
+
+@lru_cache(maxsize=256)
+def _fetch_script_file(script_id, version):
+    """Fetch an inline script's source, cached per (id, last update)."""
+    script = Script.objects.get(id=script_id, deleted=None)
+    return script.ctl.get_file()
 
 
 def fetch_script(script_id):
     """Used by mist.api.views.fetch"""
-    try:
-        script = Script.objects.get(id=script_id, deleted=None)
-    except Script.DoesNotExist:
+    script = Script.objects(id=script_id, deleted=None).only(
+        'id', 'updated', 'location').first()
+    if script is None:
         raise NotFoundError('Script does not exist')
-    return script.ctl.get_file()
+    if script.location.type != 'inline':
+        # get_file returns a fresh Response for downloads/archives;
+        # caching it would share one mutable Response across requests.
+        return script.ctl.get_file()
+    # Stale entries expire naturally, since edits bump `updated` and
+    # thus change the cache key.
+    return _fetch_script_file(script_id, str(script.updated or ''))
@@ -44,6 +44,7 @@ from mist.api.hub.tornado_shell_client import ShellHubClient
 from mist.api.notifications.models import InAppNotification
 
 from mist.api.monitoring.methods import check_monitoring
+from mist.api.monitoring.methods import check_monitoring_invalidate
 
 from mist.api.users.methods import filter_org
 from mist.api.users.methods import get_user_data
@@ -563,6 +564,9 @@ class MainConnection(MistConnection):
             if 'notifications' in sections:
                 self.update_notifications()
             if 'monitoring' in sections:
+                # The change happened in another process; drop this
+                # process' cached payload before re-sending.
+                check_monitoring_invalidate(self.owner.id)
                 self.check_monitoring()
             if 'user' in sections:
                 self.auth_context.user.reload()
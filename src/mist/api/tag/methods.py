@@ -11,6 +11,24 @@ def get_tags_for_resource(owner, resource_obj, *args, **kwargs):
                 owner, resource_obj, args, kwargs)}
 
 
+def get_tags_for_resources(owner, resource_objs, *args, **kwargs):
+    """Return the tags of many resources of the same type with one query.
+
+    Returns a dict mapping each resource id to its {key: value} tags, so
+    list endpoints avoid issuing one tag query per serialized resource.
+    """
+    resource_objs = list(resource_objs)
+    if not resource_objs:
+        return {}
+    tags = {resource_obj.id: {} for resource_obj in resource_objs}
+    for tag in Tag.objects(
+            owner=owner,
+            resource_type=resource_objs[0].to_dbref().collection.rstrip('s'),
+            resource_id__in=list(tags.keys())):
+        tags[tag.resource_id][tag.key] = tag.value
+    return tags
+
+
 def get_tag_objects_for_resource(owner, resource_obj, *args, **kwargs):
     return Tag.objects(
         owner=owner,
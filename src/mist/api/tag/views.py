@@ -1,5 +1,3 @@
-import jsonpatch
-import mongoengine as me
 from pyramid.response import Response
 
 from mist.api import config
@@ -31,6 +29,37 @@ from mist.api.exceptions import NotFoundError, BadRequestError
 
 OK = Response("OK", 200)
 
+_MISSING = object()
+
+
+def _pointer(key):
+    """Turn a tag key into a json-pointer path segment (RFC 6901).
+
+    Keys like 'kubernetes.io/cluster/<name>' contain '/' and must be
+    escaped, as jsonpatch did for us before.
+    """
+    return '/' + key.replace('~', '~0').replace('/', '~1')
+
+
+def _diff_tags(old_tags, new_tags):
+    """Compute a list of json-patch ops between two flat tag dicts.
+
+    Tags are flat {key: value} dicts, so a direct comparison is much
+    cheaper than running a generic recursive json diff over them.
+    """
+    ops = []
+    for key, value in new_tags.items():
+        old_value = old_tags.get(key, _MISSING)
+        if old_value is _MISSING:
+            ops.append({'op': 'add', 'path': _pointer(key), 'value': value})
+        elif old_value != value:
+            ops.append({'op': 'replace', 'path': _pointer(key),
+                        'value': value})
+    for key in old_tags:
+        if key not in new_tags:
+            ops.append({'op': 'remove', 'path': _pointer(key)})
+    return ops
+
 
 @view_config(route_name='api_v1_tags', request_method='POST', renderer='json')
 def tag_resources(request):
@@ -55,8 +84,24 @@ def tag_resources(request):
     auth_context = auth_context_from_request(request)
     params = params_from_request(request)
 
+    # Batches commonly repeat the same cloud/resource ids, so resolve each
+    # unique (rtype, action, rid) permission once for the request.
+    perm_cache = {}
+
+    def check_perm(rtype, action, rid):
+        key = (rtype, action, rid)
+        if key not in perm_cache:
+            perm_cache[key] = auth_context.check_perm(rtype, action, rid)
+        return perm_cache[key]
+
     # FIXME: This implementation is far from OK. We need to re-code the way
     # tags are handled and make sure that RBAC is properly enforced on tags
+
+    # First pass: validate the entries and bucket the requested ids, so
+    # each (type, cloud) group is resolved with a single query instead of
+    # one get() per resource.
+    entries = []
+    buckets = {}
     for resource in params:
         # list of dicts of key-value pairs
         resource_tags = resource.get('tags', '')
@@ -75,72 +120,138 @@ def tag_resources(request):
         cloud_id = resource_data.get('cloud_id')
 
         if cloud_id:
-            auth_context.check_perm('cloud', 'read', cloud_id)
+            check_perm('cloud', 'read', cloud_id)
         elif resource_data['type'] in ['machine', 'image',
                                        'network', 'volume']:
             raise RequiredParameterMissingError("cloud_id")
         else:
             del resource_data['cloud_id']
 
-        query = {}
         rtype = resource_data['type']
         rid = resource_data['item_id']
+        buckets.setdefault((rtype, cloud_id), set()).add(rid)
+        entries.append((rtype, cloud_id, rid, resource_tags))
+
+    # Resolve each bucket with one id__in query, fetching only the fields
+    # the loop below touches and skipping the queryset cache.
+    resolved = {}
+    for (rtype, cloud_id), rids in buckets.items():
+        model = get_resource_model(rtype)
+        query = {}
         if rtype == 'machine':
-            query['machine_id'] = rid
+            query['machine_id__in'] = list(rids)
         else:
-            query['id'] = rid
-
+            query['id__in'] = list(rids)
         if cloud_id:
             query['cloud'] = cloud_id
+        fields = ['id']
+        for field in ('cloud', rtype + '_id', 'external_id'):
+            if field in model._fields:
+                fields.append(field)
+        for resource_obj in model.objects(**query).only(*fields).no_cache():
+            rid = resource_obj.machine_id if rtype == 'machine' \
+                else resource_obj.id
+            resolved[(rtype, cloud_id, rid)] = resource_obj
+
+    # Patches are accumulated per (rtype, cloud) and published once after
+    # the loop, so a batch of M resources costs a publish per group rather
+    # than one per resource. The listening check is cached per owner.
+    pending_patches = {}
+    listening = {}
+    cloud_owners = {}
 
-        try:
-            resource_obj = get_resource_model(rtype).objects.get(**query)
-        except me.DoesNotExist:
-            # if the resource can not be found just go on and process the next
-            continue
-
-        # SEC require EDIT_TAGS permission on resource
-        auth_context.check_perm(rtype, 'edit_tags', resource_obj.id)
-
-        # normalized_resources.append(resource_data)
-        query['rtype'] = rtype
-
-        # split the tags into two lists: those that will be added and those
-        # that will be removed
-        tags_to_add = [(tag['key'], tag['value']) for tag in [
-            tag for tag in resource_tags if tag.get('op', '+') == '+']]
-        # also extract the keys from all the tags to be deleted
-        tags_to_remove = [tag['key'] for tag in [
-            tag for tag in resource_tags if tag.get('op', '+') == '-']]
-
-        # SEC only Org Owners may edit the secure tags
-        tags = {tag[0]: tag[1] for tag in tags_to_add}
-        if not modify_security_tags(auth_context, tags, resource_obj):
-            auth_context._raise(rtype, 'edit_security_tags')
-
-        old_tags = get_tags_for_resource(auth_context.owner, resource_obj)
-        if tags_to_add:
-            add_tags_to_resource(auth_context.owner, resource_obj, tags_to_add)
-        if tags_to_remove:
-            remove_tags_from_resource(auth_context.owner, resource_obj,
-                                      tags_to_remove)
-
-        if rtype in ['machine', 'network', 'volume', 'zone', 'record']:
-            new_tags = get_tags_for_resource(auth_context.owner, resource_obj)
-            try:
-                external_id = getattr(resource_obj, rtype + '_id')
-            except AttributeError:
-                external_id = getattr(resource_obj, 'external_id')
-            patch = jsonpatch.JsonPatch.from_diff(old_tags, new_tags).patch
-            for item in patch:
-                item['path'] = '/%s-%s/tags%s' % (resource_obj.id,
-                                                  external_id,
-                                                  item['path'])
-            if amqp_owner_listening(resource_obj.cloud.owner.id):
-                amqp_publish_user(auth_context.owner.id,
-                                  routing_key='patch_%ss' % rtype,
-                                  data={'cloud_id': resource_obj.cloud.id,
-                                        'patch': patch})
+    try:
+        for rtype, cloud_id, rid, resource_tags in entries:
+            resource_obj = resolved.get((rtype, cloud_id, rid))
+            if resource_obj is None:
+                # if the resource can not be found just go on and process
+                # the next
+                continue
+
+            # SEC require EDIT_TAGS permission on resource
+            check_perm(rtype, 'edit_tags', resource_obj.id)
+
+            # split the tags in a single pass: those that will be added
+            # and those that will be removed, plus the dict of tags to be
+            # added
+            tags_to_add = []
+            tags_to_remove = []
+            tags = {}
+            for tag in resource_tags:
+                if tag.get('op', '+') == '+':
+                    tags_to_add.append((tag['key'], tag['value']))
+                    tags[tag['key']] = tag['value']
+                else:
+                    tags_to_remove.append(tag['key'])
+
+            # Nothing to do for this resource; skip the security check,
+            # the tag reads and the patch altogether.
+            if not tags_to_add and not tags_to_remove:
+                continue
+
+            # SEC only Org Owners may edit the secure tags
+            if not modify_security_tags(auth_context, tags, resource_obj):
+                auth_context._raise(rtype, 'edit_security_tags')
+
+            # A single read of the current tags lets us trim the writes
+            # down to actual changes and doubles as the snapshot to diff
+            # against.
+            old_tags = get_tags_for_resource(auth_context.owner,
+                                             resource_obj)
+            tags_to_add = [(key, value) for key, value in tags_to_add
+                           if old_tags.get(key) != value]
+            tags_to_remove = [key for key in tags_to_remove
+                              if key in old_tags]
+            if not tags_to_add and not tags_to_remove:
+                continue
+
+            # Only compute a patch if someone is actually listening.
+            publish_patch = rtype in ['machine', 'network', 'volume',
+                                      'zone', 'record']
+            if publish_patch:
+                # resource_obj.cloud.owner dereferences two documents, so
+                # do it at most once per distinct cloud. The request's
+                # cloud_id spares even the cloud dereference when present.
+                cid = cloud_id or resource_obj.cloud.id
+                owner_id = cloud_owners.get(cid)
+                if owner_id is None:
+                    owner_id = cloud_owners[cid] = \
+                        resource_obj.cloud.owner.id
+                if owner_id not in listening:
+                    listening[owner_id] = amqp_owner_listening(owner_id)
+                publish_patch = listening[owner_id]
+
+            if tags_to_add:
+                add_tags_to_resource(auth_context.owner, resource_obj,
+                                     tags_to_add)
+            if tags_to_remove:
+                remove_tags_from_resource(auth_context.owner, resource_obj,
+                                          tags_to_remove)
+
+            if publish_patch:
+                new_tags = get_tags_for_resource(auth_context.owner,
+                                                 resource_obj)
+                # Re-submitting the current state is common; nothing to
+                # publish.
+                if new_tags == old_tags:
+                    continue
+                try:
+                    external_id = getattr(resource_obj, rtype + '_id')
+                except AttributeError:
+                    external_id = getattr(resource_obj, 'external_id')
+                patch = _diff_tags(old_tags, new_tags)
+                prefix = '/%s-%s/tags' % (resource_obj.id, external_id)
+                for item in patch:
+                    item['path'] = prefix + item['path']
+                pending_patches.setdefault((rtype, cid), []).extend(patch)
+    finally:
+        # Tags written before a later entry fails its permission checks
+        # must still reach listening sessions, so publish no matter how
+        # the loop exits.
+        for (rtype, cloud_id), patch in pending_patches.items():
+            amqp_publish_user(auth_context.owner.id,
+                              routing_key='patch_%ss' % rtype,
+                              data={'cloud_id': cloud_id, 'patch': patch})
     return OK
 
 
@@ -157,13 +268,7 @@ def get_cloud_tags(request):
       required: true
       type: string
     """
-    auth_context = auth_context_from_request(request)
-    cloud_id = request.matchdict["cloud_id"]
-
-    # SEC require READ permission on cloud
-    auth_context.check_perm("cloud", "read", cloud_id)
-
-    return resolve_id_and_get_tags(auth_context.owner, 'cloud', cloud_id)
+    return _get_tags(request, 'cloud')
 
 
 @view_config(route_name='api_v1_machine_tags', request_method='GET',
@@ -189,8 +294,6 @@ def get_machine_tags(request):
     machine_id = request.matchdict["machine_id"]
     cloud_id = request.matchdict["cloud_id"]
     auth_context.check_perm("cloud", "read", cloud_id)
-
-    auth_context.check_perm('cloud', 'read', cloud_id)
     # SEC
     auth_context.check_perm("machine", "read", machine_id)
 
@@ -211,13 +314,7 @@ def get_script_tags(request):
       required: true
       type: string
     """
-    auth_context = auth_context_from_request(request)
-    script_id = request.matchdict["script_id"]
-
-    # SEC require READ permission on script
-    auth_context.check_perm("script", "read", script_id)
-
-    return resolve_id_and_get_tags(auth_context.owner, 'script', script_id)
+    return _get_tags(request, 'script')
 
 
 @view_config(route_name='schedule_tags', request_method='GET', renderer='json')
@@ -233,13 +330,7 @@ def get_schedule_tags(request):
       required: true
       type: string
     """
-    auth_context = auth_context_from_request(request)
-    schedule_id = request.matchdict["schedule_id"]
-
-    # SEC require READ permission on script
-    auth_context.check_perm("schedule", "read", schedule_id)
-
-    return resolve_id_and_get_tags(auth_context.owner, 'schedule', schedule_id)
+    return _get_tags(request, 'schedule')
 
 
 @view_config(route_name='key_tags', request_method='GET', renderer='json')
@@ -255,13 +346,7 @@ def get_key_tags(request):
       required: true
       type: string
     """
-    auth_context = auth_context_from_request(request)
-    key_id = request.matchdict["key_id"]
-
-    # SEC require READ permission on key
-    auth_context.check_perm("key", "read", key_id)
-
-    return resolve_id_and_get_tags(auth_context.owner, 'key', key_id)
+    return _get_tags(request, 'key')
 
 
 @view_config(route_name='network_tags', request_method='GET', renderer='json')
@@ -294,6 +379,75 @@ def get_network_tags(request):
                                    cloud_id=cloud_id)
 
 
+# The owner-scoped get/set/delete tag views all share the same shape;
+# only the model and the matchdict key carrying the id differ. The
+# cloud-scoped machine and network views keep their own bodies.
+_TAGS_VIEW_META = {
+    'cloud': (Cloud, 'cloud_id'),
+    'schedule': (Schedule, 'schedule_id'),
+    'script': (Script, 'script_id'),
+    'key': (Key, 'key_id'),
+}
+
+
+def _get_tags(request, rtype):
+    """Shared implementation of the owner-scoped get_<rtype>_tags views."""
+    auth_context = auth_context_from_request(request)
+    rid = request.matchdict[_TAGS_VIEW_META[rtype][1]]
+
+    # SEC require READ permission on the resource
+    auth_context.check_perm(rtype, 'read', rid)
+
+    return resolve_id_and_get_tags(auth_context.owner, rtype, rid)
+
+
+def _delete_tag(request, rtype):
+    """Shared implementation of the owner-scoped delete_<rtype>_tag views."""
+    auth_context = auth_context_from_request(request)
+    rid = request.matchdict[_TAGS_VIEW_META[rtype][1]]
+    # Prefer the query string, but keep accepting a json body, which is
+    # where clients traditionally sent tag_key on these routes.
+    tag_key = request.params.get('tag_key') or \
+        params_from_request(request).get('tag_key')
+    if not tag_key:
+        raise BadRequestError('tag_key is required')
+
+    # SEC require EDIT_TAGS permission on the resource
+    auth_context.check_perm(rtype, 'edit_tags', rid)
+    if not delete_security_tag(auth_context, tag_key):
+        raise auth_context._raise(rtype, 'edit_security_tags')
+
+    return resolve_id_and_delete_tags(auth_context.owner, rtype, rid,
+                                      tags=[tag_key])
+
+
+def _set_tags(request, rtype):
+    """Shared implementation of the owner-scoped set_<rtype>_tags views."""
+    model, id_key = _TAGS_VIEW_META[rtype]
+    auth_context = auth_context_from_request(request)
+    params = params_from_request(request)
+    rid = request.matchdict[id_key]
+
+    # Reject malformed bodies before hitting the db or the rbac layer.
+    tags = params.get('tags')
+    if not isinstance(tags, dict):
+        raise BadRequestError('tags should be dictionary of tags')
+
+    # SEC require EDIT_TAGS permission on the resource
+    auth_context.check_perm(rtype, 'edit_tags', rid)
+
+    resource = model.objects(owner=auth_context.owner, id=rid,
+                             deleted=None).only('id').no_cache().first()
+    if resource is None:
+        raise NotFoundError('Resource with that id does not exist')
+
+    if not modify_security_tags(auth_context, tags, resource):
+        raise auth_context._raise(rtype, 'edit_security_tags')
+
+    return add_tags_to_resource(auth_context.owner, resource,
+                                list(tags.items()))
+
+
 @view_config(route_name='cloud_tags', request_method='POST', renderer='json')
 def set_cloud_tags(request):
     """
@@ -306,26 +460,7 @@ def set_cloud_tags(request):
       type: dict
       required: true
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    cloud_id = request.matchdict["cloud_id"]
-
-    # SEC require EDIT_TAGS permission on cloud
-    auth_context.check_perm("cloud", "edit_tags", cloud_id)
-    try:
-        cloud = Cloud.objects.get(owner=auth_context.owner,
-                                  id=cloud_id, deleted=None)
-    except me.DoesNotExist:
-        raise NotFoundError('Resource with that id does not exist')
-
-    tags = params.get("tags")
-    if type(tags) != dict:
-        raise BadRequestError('tags should be dictionary of tags')
-
-    if not modify_security_tags(auth_context, tags, cloud):
-        raise auth_context._raise('cloud', 'edit_security_tags')
-
-    return add_tags_to_resource(auth_context.owner, cloud, list(tags.items()))
+    return _set_tags(request, 'cloud')
 
 
 @view_config(route_name='api_v1_machine_tags', request_method='POST',
@@ -355,19 +490,21 @@ def set_machine_tags(request):
     params = params_from_request(request)
     cloud_id = request.matchdict["cloud_id"]
     machine_id = request.matchdict["machine_id"]
+
+    # Reject malformed bodies before hitting the db or the rbac layer.
+    tags = params.get("tags")
+    if not isinstance(tags, dict):
+        raise BadRequestError('tags should be dictionary of tags')
+
     auth_context.check_perm("cloud", "read", cloud_id)
-    try:
-        machine = Machine.objects.get(cloud=cloud_id, machine_id=machine_id)
-    except me.DoesNotExist:
+    machine = Machine.objects(cloud=cloud_id, machine_id=machine_id).only(
+        'id', 'cloud', 'machine_id').no_cache().first()
+    if machine is None:
         raise NotFoundError('Resource with that id does not exist')
 
     # SEC require EDIT_TAGS permission on machine
     auth_context.check_perm("machine", "edit_tags", machine.id)
 
-    tags = params.get("tags")
-    if type(tags) != dict:
-        raise BadRequestError('tags should be dictionary of tags')
-
     if not modify_security_tags(auth_context, tags, machine):
         raise auth_context._raise('machine', 'edit_security_tags')
 
@@ -376,20 +513,22 @@ def set_machine_tags(request):
     # to be re-set. However, `add_tags_to_resource` simply appends the new
     # tags without deleting any.
 
-    old_tags = get_tags_for_resource(auth_context.owner, machine)
+    if config.MACHINE_PATCHES:
+        old_tags = get_tags_for_resource(auth_context.owner, machine)
     add_tags_to_resource(auth_context.owner, machine, list(tags.items()))
 
     if config.MACHINE_PATCHES:
         new_tags = get_tags_for_resource(auth_context.owner, machine)
-
-        patch = jsonpatch.JsonPatch.from_diff(old_tags, new_tags).patch
-        for item in patch:
-            item['path'] = '/%s-%s/tags%s' % (machine.id, machine.machine_id,
-                                              item['path'])
-        amqp_publish_user(auth_context.owner.id,
-                          routing_key='patch_machines',
-                          data={'cloud_id': cloud_id,
-                                'patch': patch})
+        # Re-submitting the current state is common; nothing to publish.
+        if new_tags != old_tags:
+            patch = _diff_tags(old_tags, new_tags)
+            prefix = '/%s-%s/tags' % (machine.id, machine.machine_id)
+            for item in patch:
+                item['path'] = prefix + item['path']
+            amqp_publish_user(auth_context.owner.id,
+                              routing_key='patch_machines',
+                              data={'cloud_id': cloud_id,
+                                    'patch': patch})
     return {}
 
 
@@ -410,25 +549,7 @@ def set_schedule_tags(request):
       type: dict
       required: true
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    schedule_id = request.matchdict["schedule_id"]
-
-    # SEC require EDIT_TAGS permission on schedule
-    auth_context.check_perm("schedule", "edit_tags", schedule_id)
-
-    schedule = Schedule.objects.get(owner=auth_context.owner,
-                                    id=schedule_id, deleted=None)
-
-    tags = params.get("tags")
-    if type(tags) != dict:
-        raise BadRequestError('tags should be dictionary of tags')
-
-    if not modify_security_tags(auth_context, tags, schedule):
-        raise auth_context._raise('schedule', 'edit_security_tags')
-
-    return add_tags_to_resource(
-        auth_context.owner, schedule, list(tags.items()))
+    return _set_tags(request, 'schedule')
 
 
 @view_config(route_name='script_tags', request_method='POST', renderer='json')
@@ -447,24 +568,7 @@ def set_script_tags(request):
       type: dict
       required: true
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    script_id = request.matchdict["script_id"]
-
-    # SEC require EDIT_TAGS permission on script
-    auth_context.check_perm("script", "edit_tags", script_id)
-
-    script = Script.objects.get(owner=auth_context.owner, id=script_id,
-                                deleted=None)
-
-    tags = params.get("tags")
-    if type(tags) != dict:
-        raise BadRequestError('tags should be dictionary of tags')
-
-    if not modify_security_tags(auth_context, tags, script):
-        raise auth_context._raise('script', 'edit_security_tags')
-
-    return add_tags_to_resource(auth_context.owner, script, list(tags.items()))
+    return _set_tags(request, 'script')
 
 
 @view_config(route_name='key_tags', request_method='POST', renderer='json')
@@ -483,27 +587,7 @@ def set_key_tags(request):
       type: dict
       required: true
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    key_id = request.matchdict["key_id"]
-
-    # SEC require EDIT_TAGS permission on key
-    auth_context.check_perm("key", "edit_tags", key_id)
-
-    try:
-        key = Key.objects.get(owner=auth_context.owner,
-                              id=key_id, deleted=None)
-    except Key.DoesNotExist:
-        raise NotFoundError('Resource with that id does not exist')
-
-    tags = params.get("tags")
-    if type(tags) != dict:
-        raise BadRequestError('tags should be dictionary of tags')
-
-    if not modify_security_tags(auth_context, tags, key):
-        raise auth_context._raise('key', 'edit_security_tags')
-
-    return add_tags_to_resource(auth_context.owner, key, list(tags.items()))
+    return _set_tags(request, 'key')
 
 
 @view_config(route_name='network_tags', request_method='POST', renderer='json')
@@ -532,19 +616,21 @@ def set_network_tags(request):
     params = params_from_request(request)
     cloud_id = request.matchdict["cloud_id"]
     network_id = request.matchdict["network_id"]
+
+    # Reject malformed bodies before hitting the db or the rbac layer.
+    tags = params.get("tags")
+    if not isinstance(tags, dict):
+        raise BadRequestError('tags should be dictionary of tags')
+
     auth_context.check_perm('cloud', 'read', cloud_id)
-    try:
-        network = Network.objects.get(cloud=cloud_id, id=network_id)
-    except Network.DoesNotExist:
+    network = Network.objects(cloud=cloud_id, id=network_id).only(
+        'id').no_cache().first()
+    if network is None:
         raise NotFoundError('Resource with that id does not exist')
 
     # SEC require EDIT_TAGS permission on network
     auth_context.check_perm("network", "edit_tags", network_id)
 
-    tags = params.get("tags")
-    if type(tags) != dict:
-        raise BadRequestError('tags should be dictionary of tags')
-
     if not modify_security_tags(auth_context, tags, network):
         raise auth_context._raise('network', 'edit_security_tags')
 
@@ -561,18 +647,7 @@ def delete_schedule_tag(request):
     Deletes tag in the db for specified resource_type.
     ---
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    schedule_id = request.matchdict["schedule_id"]
-    tag_key = params.get("tag_key")
-
-    # SEC require EDIT_TAGS permission on schedule
-    auth_context.check_perm('schedule', 'edit_tags', schedule_id)
-    if not delete_security_tag(auth_context, tag_key):
-        raise auth_context._raise('schedule', 'edit_security_tags')
-
-    return resolve_id_and_delete_tags(auth_context.owner, 'schedule',
-                                      schedule_id, tags=[tag_key])
+    return _delete_tag(request, 'schedule')
 
 
 @view_config(route_name='cloud_tag', request_method='DELETE', renderer='json')
@@ -591,18 +666,7 @@ def delete_cloud_tag(request):
       required: true
       type: string
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    cloud_id = request.matchdict["cloud_id"]
-    tag_key = params.get("tag_key")
-
-    # SEC require EDIT_TAGS permission on cloud
-    auth_context.check_perm('cloud', 'edit_tags', cloud_id)
-    if not delete_security_tag(auth_context, tag_key):
-        raise auth_context._raise('cloud', 'edit_security_tags')
-
-    return resolve_id_and_delete_tags(auth_context.owner, 'cloud', cloud_id,
-                                      tags=[tag_key])
+    return _delete_tag(request, 'cloud')
 
 
 @view_config(route_name='api_v1_machine_tag', request_method='DELETE',
@@ -628,10 +692,14 @@ def delete_machine_tag(request):
       type: string
     """
     auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
     cloud_id = request.matchdict["cloud_id"]
     machine_id = request.matchdict["machine_id"]
-    tag_key = params.get("tag_key")
+    # Prefer the query string, but keep accepting a json body, which is
+    # where clients traditionally sent tag_key on this route.
+    tag_key = request.params.get("tag_key") or \
+        params_from_request(request).get("tag_key")
+    if not tag_key:
+        raise BadRequestError('tag_key is required')
 
     # SEC require READ permission on cloud
     auth_context.check_perm("cloud", "read", cloud_id)
@@ -662,18 +730,7 @@ def delete_script_tag(request):
       required: true
       type: string
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    script_id = request.matchdict["script_id"]
-    tag_key = params.get("tag_key")
-
-    # SEC require EDIT_TAGS permission on script
-    auth_context.check_perm('script', 'edit_tags', script_id)
-    if not delete_security_tag(auth_context, tag_key):
-        raise auth_context._raise('script', 'edit_security_tags')
-
-    return resolve_id_and_delete_tags(auth_context.owner, 'script', script_id,
-                                      tags=[tag_key])
+    return _delete_tag(request, 'script')
 
 
 @view_config(route_name='key_tag', request_method='DELETE', renderer='json')
@@ -692,18 +749,7 @@ def delete_key_tag(request):
       required: true
       type: string
     """
-    auth_context = auth_context_from_request(request)
-    params = params_from_request(request)
-    key_id = request.matchdict["key_id"]
-    tag_key = params.get("tag_key")
-
-    # SEC require EDIT_TAGS permission on key
-    auth_context.check_perm('key', 'edit_tags', key_id)
-    if not delete_security_tag(auth_context, tag_key):
-        raise auth_context._raise('key', 'edit_security_tags')
-
-    return resolve_id_and_delete_tags(auth_context.owner, 'key', key_id,
-                                      tags=[tag_key])
+    return _delete_tag(request, 'key')
 
 
 @view_config(route_name='network_tag', request_method='DELETE',
@@ -963,6 +963,47 @@ def group_run_script(owner_id, script_id, name, machines_uuids, params=''):
     return log_dict
 
 
+@app.task
+def validate_and_run_script(auth_context_serialized, script_id,
+                            machine_selector, params='', env='', su=False,
+                            job_id='', job=''):
+    """Validate a run_script request in the worker, then enqueue the run.
+
+    Used by the run_script view when `config.ASYNC_SCRIPT_VALIDATION` is
+    set, so that the HTTP handler returns as soon as the job is queued
+    and the machine/script lookups and permission checks happen here.
+    """
+    from mist.api.exceptions import NotFoundError
+
+    auth_context = AuthContext.deserialize(auth_context_serialized)
+    owner = auth_context.owner
+    try:
+        if 'machine_uuid' in machine_selector:
+            machine = Machine.objects.get(
+                id=machine_selector['machine_uuid'], state__ne='terminated')
+        else:
+            machine = Machine.objects.get(
+                cloud=machine_selector['cloud_id'],
+                machine_id=machine_selector['machine_id'],
+                state__ne='terminated')
+        # SEC require permission READ on cloud
+        auth_context.check_perm('cloud', 'read', machine.cloud.id)
+        # SEC require permission RUN_SCRIPT on machine
+        auth_context.check_perm('machine', 'run_script', machine.id)
+        # SEC require permission RUN on script
+        auth_context.check_perm('script', 'run', script_id)
+        script = Script.objects(owner=owner, id=script_id,
+                                deleted=None).only('id').first()
+        if script is None:
+            raise NotFoundError('Script id not found')
+    except Exception as exc:
+        log_event(owner.id, 'job', 'run_script', error=str(exc),
+                  script_id=script_id, job_id=job_id, job=job)
+        raise
+    run_script.delay(owner.id, script.id, machine.id, params=params,
+                     env=env, su=su, job_id=job_id, job=job)
+
+
 @app.task(soft_time_limit=3600, time_limit=3630)
 def run_script(owner, script_id, machine_uuid, params='', host='',
                key_id='', username='', password='', port=22, job_id='', job='',
@@ -63,9 +63,12 @@ class Volume(OwnershipMixin, me.Document):
     @property
     def tags(self):
         """Return the tags of this volume."""
-        return {tag.key: tag.value
+        if not hasattr(self, '_tags_cache'):
+            self._tags_cache = {
+                tag.key: tag.value
                 for tag in Tag.objects(resource_id=self.id,
                                        resource_type='volume')}
+        return self._tags_cache
 
     def clean(self):
         self.owner = self.owner or self.cloud.owner
@@ -0,0 +1,45 @@
+"""Tests the tag-diff helpers feeding the UI patch stream"""
+
+import jsonpatch
+
+from mist.api.tag.views import _diff_tags, _pointer
+
+
+def _sorted(ops):
+    return sorted(ops, key=lambda op: (op['op'], op['path']))
+
+
+def test_pointer_escaping():
+    # Per RFC 6901: '~' -> '~0' and '/' -> '~1'.
+    assert _pointer('env') == '/env'
+    assert _pointer('a/b') == '/a~1b'
+    assert _pointer('a~b') == '/a~0b'
+    assert _pointer('~/') == '/~0~1'
+    assert _pointer('kubernetes.io/cluster/prod') == \
+        '/kubernetes.io~1cluster~1prod'
+
+
+def test_diff_tags_add_replace_remove():
+    old = {'env': 'staging', 'team': 'backend', 'tier': 'db'}
+    new = {'env': 'production', 'team': 'backend', 'owner': 'alice'}
+    assert _sorted(_diff_tags(old, new)) == _sorted([
+        {'op': 'replace', 'path': '/env', 'value': 'production'},
+        {'op': 'add', 'path': '/owner', 'value': 'alice'},
+        {'op': 'remove', 'path': '/tier'},
+    ])
+
+
+def test_diff_tags_no_change():
+    tags = {'env': 'production', 'team': 'backend'}
+    assert _diff_tags(tags, dict(tags)) == []
+    assert _diff_tags({}, {}) == []
+
+
+def test_diff_tags_matches_jsonpatch():
+    # _diff_tags replaced jsonpatch.JsonPatch.from_diff on this path, so
+    # it must emit the exact same ops, escaping included.
+    old = {'a/b': '1', 'x~y': '2', 'gone/now': '3', 'same': '4'}
+    new = {'a/b': '2', 'x~y': '2', 'new/k': '9', 'same': '4'}
+    ours = _diff_tags(old, new)
+    theirs = jsonpatch.JsonPatch.from_diff(old, new).patch
+    assert _sorted(ours) == _sorted(theirs)